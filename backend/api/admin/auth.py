@@ -0,0 +1,26 @@
+import secrets
+
+from fastapi import Depends, HTTPException, status
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+
+from common.env import get_env
+
+ADMIN_TOKEN = get_env("ADMIN_TOKEN", "")
+
+bearer = HTTPBearer(auto_error=False)
+
+
+async def require_admin(
+    credentials: HTTPAuthorizationCredentials | None = Depends(bearer),
+) -> None:
+    """Admin routes need `Authorization: Bearer <ADMIN_TOKEN>`; unset disables them."""
+    if not ADMIN_TOKEN:
+        raise HTTPException(status.HTTP_403_FORBIDDEN, "Admin API is disabled")
+    if credentials is None or not secrets.compare_digest(
+        credentials.credentials.encode(), ADMIN_TOKEN.encode()
+    ):
+        raise HTTPException(
+            status.HTTP_401_UNAUTHORIZED,
+            "Invalid admin token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
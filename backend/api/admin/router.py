@@ -0,0 +1,28 @@
+from fastapi import APIRouter, Depends, Response, status
+
+from api.admin.auth import require_admin
+from api.dogs.schema import DogSyncStatus, DogSyncTriggerResult
+from api.dogs.scheduler import DogSync
+from common.admission import Admission
+
+router = APIRouter(prefix="/admin", dependencies=[Depends(require_admin)])
+
+
+@router.get("/sync")
+async def sync_status() -> DogSyncStatus:
+    return DogSync.status()
+
+
+@router.post("/sync", status_code=status.HTTP_202_ACCEPTED)
+async def trigger_sync(response: Response) -> DogSyncTriggerResult:
+    reason = DogSync.trigger()
+    if reason:
+        response.status_code = status.HTTP_409_CONFLICT
+    return DogSyncTriggerResult(
+        triggered=reason is None, reason=reason, status=DogSync.status()
+    )
+
+
+@router.get("/admission")
+async def admission_stats() -> dict:
+    return Admission.stats()
@@ -0,0 +1,257 @@
+import struct
+import threading
+from contextlib import contextmanager
+from multiprocessing.shared_memory import SharedMemory
+from typing import Iterable, Iterator, Optional
+
+from common.env import get_env
+from common.lock import FileLock
+from common.log import Log
+from .model import Dog
+
+DOG_CATALOGUE_NAME = get_env("DOG_CATALOGUE_NAME", "woofbase_dogs")
+
+# Data segment layout (little endian):
+#   header   magic[8] version:u64 journal:u64 count:u32 pad:u32
+#   offsets  u32[count + 1] for each of COLUMNS, relative to the blob start
+#   nulls    u8[count], bit i set when COLUMNS[i] is None
+#   blob     UTF-8 strings, column by column
+MAGIC = b"WOOFCAT2"
+HEADER = struct.Struct("<8sQQII")
+POINTER = struct.Struct("<Q")
+COLUMNS = ("breed", "image", "video")
+
+
+def _encode(dogs: Iterable[Dog], version: int, journal: int) -> bytes:
+    rows = [dog.to_dict() for dog in dogs]
+    count = len(rows)
+    offsets = []
+    nulls = bytearray(count)
+    blobs = []
+    position = 0
+    for column_index, column in enumerate(COLUMNS):
+        column_offsets = [position]
+        for row_index, row in enumerate(rows):
+            value = row.get(column)
+            if value is None:
+                nulls[row_index] |= 1 << column_index
+            else:
+                encoded = value.encode("utf-8")
+                blobs.append(encoded)
+                position += len(encoded)
+            column_offsets.append(position)
+        offsets.append(struct.pack(f"<{count + 1}I", *column_offsets))
+
+    return b"".join(
+        [HEADER.pack(MAGIC, version, journal, count, 0), *offsets, bytes(nulls), *blobs]
+    )
+
+
+class _CatalogueSnapshot:
+    """
+    One attached catalogue version, kept open while any reader holds it.
+    `journal` is the DogJournal version the dogs were read at.
+    """
+
+    def __init__(self, segment: SharedMemory, version: int, journal: int, count: int):
+        self.segment = segment
+        self.version = version
+        self.journal = journal
+        self.count = count
+        self.readers = 0
+        self.superseded = False
+
+    def page(self, page: int, size: int) -> list[dict]:
+        if page < 1:
+            return []
+        start = (page - 1) * size
+        stop = min(start + size, self.count)
+        if start >= stop:
+            return []
+
+        buf = self.segment.buf
+        count = self.count
+        nulls_at = HEADER.size + len(COLUMNS) * (count + 1) * 4
+        blob_at = nulls_at + count
+        columns = []
+        for column_index in range(len(COLUMNS)):
+            offsets_at = HEADER.size + column_index * (count + 1) * 4
+            columns.append(
+                struct.unpack_from(f"<{stop - start + 1}I", buf, offsets_at + start * 4)
+            )
+
+        dogs = []
+        for row in range(stop - start):
+            flags = buf[nulls_at + start + row]
+            dog = {}
+            for column_index, column in enumerate(COLUMNS):
+                if flags & (1 << column_index):
+                    dog[column] = None
+                    continue
+                offsets = columns[column_index]
+                dog[column] = bytes(
+                    buf[blob_at + offsets[row] : blob_at + offsets[row + 1]]
+                ).decode("utf-8")
+            dogs.append(dog)
+        return dogs
+
+
+class _SharedCatalogue:
+    """
+    Read-mostly snapshot of the synced dogs, shared by every worker process.
+
+    A small pointer segment holds the current version; each version lives in
+    its own data segment, so a publish is a full write of the new segment
+    followed by a single pointer update. Readers take a snapshot per request,
+    which re-attaches when the version has changed; a superseded segment is
+    only closed once the last thread reading it lets go.
+
+    Every process holds a shared lock on an attach file between open() and
+    close(). The first process to open and the last to close find it free,
+    and unlink the segments, so a restart never serves a stale catalogue.
+    """
+
+    def __init__(self, name: str = DOG_CATALOGUE_NAME):
+        self.name = name
+        self._lock = threading.Lock()
+        self._pointer: Optional[SharedMemory] = None
+        self._current: Optional[_CatalogueSnapshot] = None
+        self._attached = FileLock(f"{name}.attach")
+        self._closed = False
+
+    def open(self) -> None:
+        self._closed = False
+        if self._attached.acquire(blocking=False):
+            self._unlink_all()
+        self._attached.acquire(shared=True)
+
+    @contextmanager
+    def snapshot(self) -> Iterator[Optional[_CatalogueSnapshot]]:
+        """Yield the current version, or None if nothing is published yet."""
+        with self._lock:
+            self._refresh()
+            snapshot = self._current
+            if snapshot is not None:
+                snapshot.readers += 1
+        try:
+            yield snapshot
+        finally:
+            if snapshot is not None:
+                with self._lock:
+                    snapshot.readers -= 1
+                    self._release(snapshot)
+
+    def count(self) -> int:
+        with self.snapshot() as snapshot:
+            return snapshot.count if snapshot is not None else 0
+
+    def publish(self, dogs: Iterable[Dog], journal: int = 0) -> int:
+        with FileLock(self.name):
+            with self._lock:
+                if self._closed:
+                    # Segments created now would outlive the last worker.
+                    Log.warn("Dog catalogue is closed, not publishing")
+                    return 0
+                pointer = self._attach_pointer()
+            previous = POINTER.unpack_from(pointer.buf)[0]
+            version = previous + 1
+            data = _encode(dogs, version, journal)
+            segment = SharedMemory(
+                name=self._segment_name(version),
+                create=True,
+                size=len(data),
+                track=False,
+            )
+            segment.buf[: len(data)] = data
+            segment.close()
+            POINTER.pack_into(pointer.buf, 0, version)
+            if previous:
+                self._unlink(previous)
+
+        Log.info(f"Published dog catalogue version {version} ({len(data)} bytes)")
+        return version
+
+    def close(self) -> None:
+        # Taking the publish lock waits out a publish already in progress.
+        with FileLock(self.name), self._lock:
+            self._closed = True
+        with self._lock:
+            if self._current is not None:
+                self._current.superseded = True
+                self._release(self._current)
+                self._current = None
+            if self._pointer is not None:
+                self._pointer.close()
+                self._pointer = None
+        if self._attached.held:
+            if self._attached.acquire(blocking=False):
+                self._unlink_all()
+            self._attached.release()
+
+    def _refresh(self) -> None:
+        try:
+            pointer = self._attach_pointer()
+        except OSError as error:
+            Log.warn("Dog catalogue is unavailable", error=error)
+            return
+        version = POINTER.unpack_from(pointer.buf)[0]
+        current = self._current
+        if not version or (current is not None and version == current.version):
+            return
+        try:
+            segment = SharedMemory(name=self._segment_name(version), track=False)
+        except FileNotFoundError:
+            # Superseded between reading the pointer and attaching; the next
+            # read picks up the newer version.
+            return
+        magic, segment_version, journal, count, _ = HEADER.unpack_from(segment.buf)
+        if magic != MAGIC or segment_version != version:
+            segment.close()
+            return
+        self._current = _CatalogueSnapshot(segment, version, journal, count)
+        if current is not None:
+            current.superseded = True
+            self._release(current)
+
+    def _release(self, snapshot: _CatalogueSnapshot) -> None:
+        if snapshot.superseded and not snapshot.readers:
+            snapshot.segment.close()
+
+    def _attach_pointer(self) -> SharedMemory:
+        if self._pointer is None:
+            try:
+                self._pointer = SharedMemory(name=self.name, track=False)
+            except FileNotFoundError:
+                try:
+                    self._pointer = SharedMemory(
+                        name=self.name, create=True, size=POINTER.size, track=False
+                    )
+                except FileExistsError:
+                    self._pointer = SharedMemory(name=self.name, track=False)
+        return self._pointer
+
+    def _segment_name(self, version: int) -> str:
+        return f"{self.name}_v{version}"
+
+    def _unlink(self, version: int) -> None:
+        try:
+            segment = SharedMemory(name=self._segment_name(version), track=False)
+        except FileNotFoundError:
+            return
+        segment.close()
+        segment.unlink()
+
+    def _unlink_all(self) -> None:
+        try:
+            pointer = SharedMemory(name=self.name, track=False)
+        except FileNotFoundError:
+            return
+        version = POINTER.unpack_from(pointer.buf)[0]
+        pointer.close()
+        if version:
+            self._unlink(version)
+        pointer.unlink()
+        Log.info(f"Removed dog catalogue version {version} from shared memory")
+
+
+Catalogue = _SharedCatalogue()
@@ -0,0 +1,138 @@
+from typing import Optional
+
+from sqlalchemy import and_, exists
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, aliased
+
+from common.db import get_db
+from common.env import get_env
+from common.log import Log
+from .model import DogChange, DogJournalState
+from .schema import DogChangeSchema, DogChangesResult
+
+DOG_CHANGE_RETENTION = get_env("DOG_CHANGE_RETENTION", 100)
+DOG_CHANGE_LIMIT = get_env("DOG_CHANGE_LIMIT", 1000)
+
+
+class DogJournal:
+    """
+    Append-only log of the inserts, updates and deletes made by each sync,
+    tagged with a version that increases by one per sync that changed
+    something.
+
+    Compaction keeps only the latest change per breed, so a delta is the net
+    effect since the client's version rather than a replay: clients should
+    apply "insert" and "update" as upserts, starting from the version on the
+    /dogs page they bootstrapped from. Versions older than
+    DOG_CHANGE_RETENTION syncs are dropped, and asking for them returns
+    resync_required.
+
+    Writers share the sync's session: lock() takes a row lock on the journal
+    state, and record() adds the entries without committing, so the dog
+    writes and their journal entries commit (or roll back) together.
+    """
+
+    def __init__(self, session: Optional[Session] = None):
+        self.session = session or next(get_db())
+
+    def lock(self) -> DogJournalState:
+        return self._get_state(for_update=True)
+
+    def record(self, changes: list[tuple[str, dict]]) -> int:
+        state = self._get_state(for_update=True)
+        if not changes:
+            return state.version
+
+        state.version += 1
+        for op, dog in changes:
+            self.session.add(
+                DogChange(
+                    version=state.version,
+                    op=op,
+                    breed=dog["breed"],
+                    image=dog.get("image") if op != "delete" else None,
+                    video=dog.get("video") if op != "delete" else None,
+                )
+            )
+        self.session.flush()
+        self._compact(state)
+        Log.info(
+            f"Recorded {len(changes)} dog changes at journal version {state.version}"
+        )
+        return state.version
+
+    def version(self) -> int:
+        state = self.session.get(DogJournalState, 1, populate_existing=True)
+        return state.version if state is not None else 0
+
+    def since(self, version: int) -> DogChangesResult:
+        state = self.session.get(DogJournalState, 1, populate_existing=True)
+        if state is None:
+            state = DogJournalState(id=1, version=0, oldest=0)
+        if version < state.oldest or version > state.version:
+            return DogChangesResult(
+                since=version,
+                version=state.version,
+                resync_required=True,
+                changes=[],
+            )
+
+        changes = (
+            self.session.query(DogChange)
+            .filter(DogChange.version > version)
+            .order_by(DogChange.version, DogChange.id)
+            .limit(DOG_CHANGE_LIMIT + 1)
+            .all()
+        )
+        if len(changes) > DOG_CHANGE_LIMIT:
+            # Cheaper for the client to re-page the catalogue than to apply
+            # a delta this large.
+            return DogChangesResult(
+                since=version,
+                version=state.version,
+                resync_required=True,
+                changes=[],
+            )
+
+        return DogChangesResult(
+            since=version,
+            version=state.version,
+            resync_required=False,
+            changes=[DogChangeSchema.model_validate(change) for change in changes],
+        )
+
+    def _compact(self, state: DogJournalState) -> None:
+        newer = aliased(DogChange)
+        superseded = exists().where(
+            and_(newer.breed == DogChange.breed, newer.version > DogChange.version)
+        )
+        self.session.query(DogChange).filter(superseded).delete(
+            synchronize_session=False
+        )
+
+        oldest = state.version - DOG_CHANGE_RETENTION
+        if oldest > state.oldest:
+            self.session.query(DogChange).filter(DogChange.version <= oldest).delete(
+                synchronize_session=False
+            )
+            state.oldest = oldest
+
+    def _get_state(self, for_update: bool = False) -> DogJournalState:
+        query = (
+            self.session.query(DogJournalState)
+            .filter(DogJournalState.id == 1)
+            .populate_existing()
+        )
+        if for_update:
+            query = query.with_for_update()
+        state = query.first()
+        if state is None:
+            # Another worker may be creating the row too; whoever loses the
+            # insert just reads the winner's row.
+            try:
+                with self.session.begin_nested():
+                    self.session.add(DogJournalState(id=1, version=0, oldest=0))
+            except IntegrityError:
+                pass
+            state = query.first()
+        return state
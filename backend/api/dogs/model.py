@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String
+from sqlalchemy import Column, Integer, String
 from sqlalchemy.ext.declarative import declarative_base
 
 Base = declarative_base()
@@ -33,3 +33,26 @@ class Dog(Base):
 
     def update_from_dict(self, data: dict) -> None:
         self.from_dict(data)
+
+
+class DogChange(Base):
+    __tablename__ = "dog_changes"
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    version = Column(Integer, nullable=False, index=True)
+    op = Column(String, nullable=False)
+    breed = Column(String, nullable=False, index=True)
+    image = Column(String, nullable=True)
+    video = Column(String, nullable=True)
+
+    def __repr__(self) -> str:
+        return f"<DogChange(version={self.version}, op={self.op}, breed={self.breed})>"
+
+
+class DogJournalState(Base):
+    __tablename__ = "dog_journal_state"
+    id = Column(Integer, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+    oldest = Column(Integer, nullable=False, default=0)
+
+    def __repr__(self) -> str:
+        return f"<DogJournalState(version={self.version}, oldest={self.oldest})>"
@@ -1,21 +1,61 @@
+import asyncio
+
 from clients.olive import OliveClient
 from .model import Dog
 from common.db import get_db
 from common.log import Log
 from api.dogs.service import DogService
+from api.dogs.catalogue import Catalogue
+from api.dogs.journal import DogJournal
 
 
 class DogRetriever:
 
     @staticmethod
-    async def sync_dogs() -> None:
+    async def sync_dogs() -> int:
+        """
+        Fetch the upstream dogs on the event loop, then apply them to the
+        database in a worker thread. Returns the number of inserts, updates
+        and deletes; errors are logged and re-raised for the scheduler.
+        Cancelling during the fetch stops at once; during the apply, it waits
+        for the thread to finish.
+        """
         Log.info("Starting dog synchronization with Olive API")
         try:
-            dog_service = DogService()
             client = OliveClient()
-            olive_dogs = await client.fetch_all(endpoint="dogs")
-            olive_dog_breeds = {dog["breed"] for dog in olive_dogs}
+            try:
+                olive_dogs = await client.fetch_all(endpoint="dogs")
+            finally:
+                await client.close()
             Log.info(f"Fetched {len(olive_dogs)} dogs from Olive API")
+            apply = asyncio.ensure_future(
+                asyncio.to_thread(DogRetriever.apply_dogs, olive_dogs)
+            )
+            try:
+                changes = await asyncio.shield(apply)
+            except asyncio.CancelledError:
+                # The thread cannot be interrupted, so let it commit and
+                # publish before shutdown closes the catalogue.
+                await apply
+                raise
+            Log.info(f"Dog synchronization completed successfully ({changes} changes)")
+            return changes
+        except Exception as error:
+            Log.error(f"Error during dog synchronization!", error=error)
+            raise
+
+    @staticmethod
+    def apply_dogs(olive_dogs: list[dict]) -> int:
+        """
+        Apply the upstream dogs and their journal entries in one transaction,
+        holding the journal row lock so concurrent syncs are serialized.
+        """
+        changes = []
+        dog_service = DogService()
+        journal = DogJournal(session=dog_service.session)
+        try:
+            journal.lock()
+            olive_dog_breeds = {dog["breed"] for dog in olive_dogs}
             Log.debug(f"Olive dog breeds: {olive_dog_breeds}")
             local_dogs = dog_service.get_all()
             local_dog_breeds = {dog.breed for dog in local_dogs}
@@ -23,16 +63,19 @@ class DogRetriever:
             Log.debug(f"Local dog breeds: {local_dog_breeds}")
             for olive_dog in olive_dogs:
                 if olive_dog["breed"] not in local_dog_breeds:
-                    dog_service.add(olive_dog)
+                    dog_service.add(olive_dog, commit=False)
+                    local_dog_breeds.add(olive_dog["breed"])
+                    changes.append(("insert", olive_dog))
                     Log.info(f"Added new dog to local database: {olive_dog['breed']}")
 
-                elif olive_dog["breed"] in local_dog_breeds:
+                else:
                     local_dog = dog_service.find(olive_dog["breed"])
                     if local_dog is not None:
                         if olive_dog.get("image") and local_dog.image != olive_dog.get(
                             "image"
                         ):
-                            dog_service.update(local_dog, olive_dog)
+                            dog_service.update(local_dog, olive_dog, commit=False)
+                            changes.append(("update", local_dog.to_dict()))
                             Log.info(
                                 f"Updated dog '{local_dog.breed}' in database with new image: {olive_dog.get('image')}"
                             )
@@ -42,9 +85,15 @@ class DogRetriever:
                     local_dog.breed not in olive_dog_breeds
                     and not local_dog.breed.startswith("#")  # type: ignore
                 ):
-                    dog_service.remove(local_dog)
+                    changes.append(("delete", local_dog.to_dict()))
+                    dog_service.remove(local_dog, commit=False)
                     Log.info(f"Removed dog from local database: {local_dog.breed}")
 
-            Log.info("Dog synchronization completed successfully")
-        except Exception as error:
-            Log.error(f"Error during dog synchronization!", error=error)
+            version = journal.record(changes)
+            dog_service.session.commit()
+        except Exception:
+            dog_service.session.rollback()
+            raise
+
+        Catalogue.publish(dog_service.get_all(), journal=version)
+        return len(changes)
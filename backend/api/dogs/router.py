@@ -1,8 +1,11 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends
+from sqlalchemy.orm import Session
 
+from api.dogs.journal import DogJournal
 from api.dogs.service import DogService
-from api.dogs.schema import DogPageResult
+from api.dogs.schema import DogChangesResult, DogPageResult
 from clients.olive import OliveClient
+from common.db import get_db
 
 router = APIRouter()
 client = OliveClient()
@@ -12,3 +15,12 @@ dog_service = DogService()
 @router.get("/dogs")
 def list(page: int = 1) -> DogPageResult:
     return dog_service.get_page(page=page)
+
+
+@router.get("/dogs/changes")
+def changes(since: int = 0, session: Session = Depends(get_db)) -> DogChangesResult:
+    return DogJournal(session=session).since(version=since)
+
+
+def is_cached_request(scope: dict) -> bool:
+    return scope["path"] == "/dogs" and DogService.is_page_cached()
@@ -0,0 +1,181 @@
+import asyncio
+import os
+import random
+from collections import deque
+from datetime import datetime, timedelta, timezone
+from time import monotonic, time
+from typing import Optional
+
+from common.env import get_env
+from common.lock import FileLock, lock_path
+from common.log import Log
+from .catalogue import DOG_CATALOGUE_NAME
+from .retriever import DogRetriever
+from .schema import DogSyncStatus
+
+DOG_SYNC_INTERVAL = get_env("DOG_SYNC_INTERVAL", 300)
+DOG_SYNC_MIN_INTERVAL = get_env("DOG_SYNC_MIN_INTERVAL", 60)
+DOG_SYNC_MAX_INTERVAL = get_env("DOG_SYNC_MAX_INTERVAL", 1800)
+DOG_SYNC_MAX_BACKOFF = get_env("DOG_SYNC_MAX_BACKOFF", 3600)
+DOG_SYNC_JITTER = get_env("DOG_SYNC_JITTER", 0.1)
+DOG_SYNC_HISTORY = get_env("DOG_SYNC_HISTORY", 10)
+
+# How often the leader looks for a trigger from another worker.
+TRIGGER_POLL_INTERVAL = 1.0
+
+
+class _DogSyncScheduler:
+    """
+    Runs DogRetriever.sync_dogs from a single loop so at most one sync is in
+    flight. The delay before the next run shrinks toward DOG_SYNC_MIN_INTERVAL
+    when recent syncs found changes and grows toward DOG_SYNC_MAX_INTERVAL when
+    they did not; upstream errors back off exponentially from
+    DOG_SYNC_INTERVAL. A trigger wakes the loop early.
+
+    With several workers, only the one holding the sync file lock runs the
+    loop; the rest stand by and take over if it exits. The leader publishes
+    its status to a file so every worker can report it, and any worker can
+    trigger a sync by touching the trigger file the leader polls.
+    """
+
+    def __init__(self):
+        self.history: deque[bool] = deque(maxlen=DOG_SYNC_HISTORY)
+        self.running = False
+        self.errors = 0
+        self.last_started: Optional[datetime] = None
+        self.last_finished: Optional[datetime] = None
+        self.last_duration: Optional[float] = None
+        self.last_outcome: Optional[str] = None
+        self.last_changes: Optional[int] = None
+        self.last_error: Optional[str] = None
+        self.next_run: Optional[datetime] = None
+        self._leader = FileLock(f"{DOG_CATALOGUE_NAME}.sync")
+        self._status_path = lock_path(f"{DOG_CATALOGUE_NAME}.sync.status")
+        self._trigger_path = lock_path(f"{DOG_CATALOGUE_NAME}.sync.trigger")
+        self._triggered_at = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._leader.release()
+
+    def trigger(self) -> Optional[str]:
+        """
+        Request a sync now. Returns why the request was refused, or None if
+        it was accepted. Triggers also cut short a backoff after upstream
+        errors, so they are limited to one per DOG_SYNC_MIN_INTERVAL.
+        """
+        status = self.status()
+        if status.running:
+            return "A sync is already running"
+        wait = DOG_SYNC_MIN_INTERVAL - (time() - self._trigger_mtime())
+        if wait > 0:
+            return f"A sync was triggered recently, try again in {wait:.0f}s"
+        with open(self._trigger_path, "w") as f:
+            f.write(str(os.getpid()))
+        return None
+
+    def status(self) -> DogSyncStatus:
+        if not self._leader.held:
+            try:
+                with open(self._status_path) as f:
+                    return DogSyncStatus.model_validate_json(f.read())
+            except (OSError, ValueError):
+                pass
+        return DogSyncStatus(
+            running=self.running,
+            last_started=self.last_started,
+            last_finished=self.last_finished,
+            last_duration=self.last_duration,
+            last_outcome=self.last_outcome,
+            last_changes=self.last_changes,
+            last_error=self.last_error,
+            next_run=self.next_run,
+            interval=self.interval(),
+            consecutive_errors=self.errors,
+        )
+
+    def interval(self) -> float:
+        if self.errors:
+            return min(DOG_SYNC_INTERVAL * 2 ** (self.errors - 1), DOG_SYNC_MAX_BACKOFF)
+        if not self.history:
+            return DOG_SYNC_INTERVAL
+        change_rate = sum(self.history) / len(self.history)
+        return DOG_SYNC_MAX_INTERVAL - (
+            (DOG_SYNC_MAX_INTERVAL - DOG_SYNC_MIN_INTERVAL) * change_rate
+        )
+
+    async def _loop(self) -> None:
+        while not self._leader.acquire(blocking=False):
+            await asyncio.sleep(self._jitter(DOG_SYNC_MIN_INTERVAL))
+        Log.info(f"Worker {os.getpid()} is running dog synchronization")
+        self._triggered_at = self._trigger_mtime()
+
+        while True:
+            await self._run()
+            delay = self._jitter(self.interval())
+            self.next_run = datetime.now(timezone.utc) + timedelta(seconds=delay)
+            self._publish_status()
+            Log.info(f"Next dog synchronization in {delay:.0f}s")
+            await self._wait(delay)
+
+    async def _wait(self, delay: float) -> None:
+        deadline = monotonic() + delay
+        while monotonic() < deadline:
+            await asyncio.sleep(min(TRIGGER_POLL_INTERVAL, deadline - monotonic()))
+            triggered_at = self._trigger_mtime()
+            if triggered_at > self._triggered_at:
+                self._triggered_at = triggered_at
+                Log.info("Dog synchronization triggered manually")
+                return
+
+    def _jitter(self, delay: float) -> float:
+        return delay + delay * random.uniform(-DOG_SYNC_JITTER, DOG_SYNC_JITTER)
+
+    def _trigger_mtime(self) -> float:
+        try:
+            return os.stat(self._trigger_path).st_mtime
+        except FileNotFoundError:
+            return 0.0
+
+    def _publish_status(self) -> None:
+        temp_path = f"{self._status_path}.{os.getpid()}"
+        with open(temp_path, "w") as f:
+            f.write(self.status().model_dump_json())
+        os.replace(temp_path, self._status_path)
+
+    async def _run(self) -> None:
+        self.running = True
+        self.next_run = None
+        self.last_started = datetime.now(timezone.utc)
+        self._publish_status()
+        started = monotonic()
+        try:
+            changes = await DogRetriever.sync_dogs()
+            self.history.append(changes > 0)
+            self.errors = 0
+            self.last_changes = changes
+            self.last_error = None
+            self.last_outcome = "changed" if changes else "unchanged"
+        except Exception as error:
+            self.errors += 1
+            self.last_changes = None
+            self.last_error = str(error)
+            self.last_outcome = "error"
+        finally:
+            self.running = False
+            self.last_finished = datetime.now(timezone.utc)
+            self.last_duration = round(monotonic() - started, 3)
+
+
+DogSync = _DogSyncScheduler()
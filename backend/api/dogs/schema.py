@@ -1,3 +1,4 @@
+from datetime import datetime
 from pydantic import BaseModel
 from typing import Optional
 
@@ -17,6 +18,7 @@ class DogPageResult(BaseModel):
     cached: bool
     total_dogs: int
     total_pages: int
+    version: int
 
 
 class DogCreateSchema(BaseModel):
@@ -27,3 +29,40 @@ class DogCreateSchema(BaseModel):
 class DogUpdateSchema(BaseModel):
     breed: Optional[str] = None
     image: Optional[str] = None
+
+
+class DogSyncStatus(BaseModel):
+    running: bool
+    last_started: Optional[datetime] = None
+    last_finished: Optional[datetime] = None
+    last_duration: Optional[float] = None
+    last_outcome: Optional[str] = None
+    last_changes: Optional[int] = None
+    last_error: Optional[str] = None
+    next_run: Optional[datetime] = None
+    interval: float
+    consecutive_errors: int
+
+
+class DogSyncTriggerResult(BaseModel):
+    triggered: bool
+    reason: Optional[str] = None
+    status: DogSyncStatus
+
+
+class DogChangeSchema(BaseModel):
+    version: int
+    op: str
+    breed: str
+    image: Optional[str] = None
+    video: Optional[str] = None
+
+    class Config:
+        from_attributes = True
+
+
+class DogChangesResult(BaseModel):
+    since: int
+    version: int
+    resync_required: bool
+    changes: list[DogChangeSchema]
@@ -1,6 +1,8 @@
 from common.env import get_env
 from common.db import get_db
 from common.cache import Cache
+from .catalogue import Catalogue
+from .journal import DogJournal
 from .schema import DogPageResult, DogSchema
 from .model import Dog
 
@@ -17,12 +19,19 @@ class DogService:
         return dog
 
     def get_page(self, page: int = 1) -> DogPageResult:
+        with Catalogue.snapshot() as catalogue:
+            if catalogue is not None and catalogue.count:
+                return self._get_page_catalogue(catalogue, page)
+
+        # Read the journal version before the dogs, so the page is at least
+        # as new as the version clients bootstrap from.
+        version = DogJournal(session=self.session).version()
         total_dogs = self.session.query(Dog).count()
-        cached_page = self._get_dog_page_cache(page)
+        cached_page = self._get_dog_page_cache(version, page)
         if cached_page:
             dogs = cached_page
         else:
-            dogs = self._get_dog_page_db(page)
+            dogs = self._get_dog_page_db(version, page)
 
         if page == 1 and not cached_page and len(dogs) > 0:
             dogs.insert(
@@ -40,41 +49,75 @@ class DogService:
             cached=bool(cached_page),
             total_dogs=total_dogs,
             total_pages=(total_dogs + DOG_PAGE_SIZE - 1) // DOG_PAGE_SIZE,
+            version=version,
         )
 
+    def _get_page_catalogue(self, catalogue, page: int) -> DogPageResult:
+        total_dogs = catalogue.count
+        dogs = catalogue.page(page, DOG_PAGE_SIZE)
+        if page == 1 and len(dogs) > 0:
+            dogs.insert(
+                0,
+                {
+                    "breed": "#1 Doggo",
+                    "video": "https://woof.mikeharty.com/lowkey.mp4",
+                    "image": "https://woof.mikeharty.com/poster.png",
+                },
+            )
+
+        return DogPageResult(
+            dogs=[DogSchema.model_validate(dog) for dog in dogs],
+            page=page,
+            cached=True,
+            total_dogs=total_dogs,
+            total_pages=(total_dogs + DOG_PAGE_SIZE - 1) // DOG_PAGE_SIZE,
+            version=catalogue.journal,
+        )
+
+    @staticmethod
+    def is_page_cached() -> bool:
+        # Only the catalogue path avoids the database; the page cache path
+        # still runs a count query.
+        return bool(Catalogue.count())
+
     def get_all(self) -> list[Dog]:
         return self.session.query(Dog).all()
 
-    def add(self, dog_data: dict) -> Dog:
+    def add(self, dog_data: dict, commit: bool = True) -> Dog:
         new_dog = Dog.create_from_dict(dog_data)
         self.session.add(new_dog)
-        self.session.commit()
+        if commit:
+            self.session.commit()
         return new_dog
 
-    def update(self, dog: Dog, dog_data: dict) -> Dog:
+    def update(self, dog: Dog, dog_data: dict, commit: bool = True) -> Dog:
         for key, value in dog_data.items():
             setattr(dog, key, value)
-        self.session.commit()
+        if commit:
+            self.session.commit()
         return dog
 
-    def remove(self, dog: Dog) -> None:
+    def remove(self, dog: Dog, commit: bool = True) -> None:
         self.session.delete(dog)
-        self.session.commit()
+        if commit:
+            self.session.commit()
 
     def _get_dog_cache(self, breed: str) -> "Dog | None":
         return Cache.get(f"dog_{breed}")
 
-    def _get_dog_page_cache(self, page: int) -> list["Dog"]:
-        return Cache.get(f"dogs_page_{page}")
+    def _get_dog_page_cache(self, version: int, page: int) -> list["Dog"]:
+        return Cache.get(f"dogs_page_{version}_{page}")
 
-    def _set_dog_page_cache(self, page: int, dogs: list["Dog"]) -> None:
-        Cache.set(f"dogs_page_{page}", dogs, ttl=60)
+    def _set_dog_page_cache(self, version: int, page: int, dogs: list["Dog"]) -> None:
+        Cache.set(f"dogs_page_{version}_{page}", dogs, ttl=60)
 
     def _get_dog_db(self, breed: str) -> "Dog | None":
         return self.session.query(Dog).filter(Dog.breed == breed).first()
 
-    def _get_dog_page_db(self, page: int = 1, limit: int = 15) -> list["Dog"]:
+    def _get_dog_page_db(
+        self, version: int, page: int = 1, limit: int = 15
+    ) -> list["Dog"]:
         offset = (page - 1) * limit
         dogs = self.session.query(Dog).offset(offset).limit(limit).all()
-        self._set_dog_page_cache(page, dogs)
+        self._set_dog_page_cache(version, page, dogs)
         return dogs
@@ -1,5 +1,7 @@
+from .admin.router import router as admin_router
 from .dogs.router import router as dogs_router
 
 
 def include_routers(app):
     app.include_router(dogs_router, tags=["dogs"])
+    app.include_router(admin_router, tags=["admin"])
@@ -1,13 +1,52 @@
+"""
+Profiling tool for the Olive dogs API (or anything serving the same shape).
+
+Runs concurrent request campaigns over one pooled client with a rate limit,
+then reports latency percentiles and histograms, status codes and per-page
+response consistency. Run from the backend directory, e.g.:
+
+    python -m clients.olive_tests pages --pages 1-10 --repeat 20 -c 8 --rate 20
+    python -m clients.olive_tests pages --target local --report report.json
+    python -m clients.olive_tests last-page
+    python -m clients.olive_tests limit-params
+    python -m clients.olive_tests overload --target local --stages 8,32,128
+    python -m clients.olive_tests overload --target stub [--no-admission]
+"""
+
+import argparse
 import asyncio
+import hashlib
 import json
+import math
 import random
 import time
-from typing import Dict, Any, Optional
-from dataclasses import dataclass
+from collections import Counter, defaultdict
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, Optional
+
 import httpx
 
 REQUEST_LOG = "./clients/olive_requests.log"
 
+TARGETS = {
+    "olive": "https://interview-api-olive.vercel.app/api/dogs",
+    "local": "http://localhost:8000/dogs",
+}
+
+LATENCY_BUCKETS = [0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 30]
+
+LIMIT_PARAM_NAMES = [
+    "limit",
+    "count",
+    "size",
+    "num",
+    "number",
+    "results",
+    "per_page",
+    "max",
+    "take",
+]
+
 DOG_WORDS = [
     "Paw",
     "Bark",
@@ -44,14 +83,94 @@ class TestResult:
     response_time: float
     json_valid: bool
     data_length: Any
-    data_hash: Optional[int]
+    data_hash: Optional[str]
     response_size: int
-    data: str
     query_params: Dict[str, Any]
     error: Optional[str] = None
+    retry_after: Optional[float] = None
+
+    @property
+    def has_data(self) -> bool:
+        return (
+            self.status_code == 200
+            and self.json_valid
+            and isinstance(self.data_length, int)
+            and self.data_length > 0
+        )
+
+
+@dataclass
+class Stats:
+    latencies: list[float] = field(default_factory=list)
+    ok_latencies: list[float] = field(default_factory=list)
+    statuses: Counter = field(default_factory=Counter)
+    hashes: Counter = field(default_factory=Counter)
+
+    def add(self, result: TestResult) -> None:
+        self.latencies.append(result.response_time)
+        if result.status_code == 200:
+            self.ok_latencies.append(result.response_time)
+        self.statuses[str(result.status_code or "error")] += 1
+        if result.has_data and result.data_hash is not None:
+            self.hashes[result.data_hash] += 1
+
+    def summary(self) -> dict:
+        latencies = sorted(self.latencies)
+        ok_latencies = sorted(self.ok_latencies)
+        histogram = Counter()
+        for latency in latencies:
+            bucket = next((b for b in LATENCY_BUCKETS if latency <= b), None)
+            histogram[f"<={bucket}s" if bucket is not None else "inf"] += 1
+        return {
+            "requests": len(latencies),
+            "latency": {
+                "min": latencies[0] if latencies else None,
+                "max": latencies[-1] if latencies else None,
+                "mean": (
+                    round(sum(latencies) / len(latencies), 4) if latencies else None
+                ),
+                "p50": percentile(latencies, 50),
+                "p90": percentile(latencies, 90),
+                "p95": percentile(latencies, 95),
+                "p99": percentile(latencies, 99),
+                "histogram": dict(histogram),
+            },
+            # Latency of 200s only, so shed 429/503s don't flatter the p99
+            # when profiling a server under overload.
+            "ok_latency": {
+                "p50": percentile(ok_latencies, 50),
+                "p99": percentile(ok_latencies, 99),
+            },
+            "statuses": dict(self.statuses),
+            "unique_responses": len(self.hashes),
+            "consistent": len(self.hashes) <= 1,
+            "response_hashes": dict(self.hashes),
+        }
+
+
+def percentile(values: list[float], pct: float) -> Optional[float]:
+    """Nearest-rank percentile of already sorted values."""
+    if not values:
+        return None
+    rank = max(1, min(len(values), math.ceil(pct / 100 * len(values))))
+    return values[rank - 1]
+
+
+def page_items(data: Any) -> Optional[list]:
+    """
+    The dogs on a page: Olive returns a bare list, our /dogs wraps it in an
+    envelope whose other fields (such as `cached`) vary between requests.
+    """
+    if isinstance(data, dict) and isinstance(data.get("dogs"), list):
+        return data["dogs"]
+    if isinstance(data, list):
+        return data
+    return None
 
 
-BASE_URL = "https://interview-api-olive.vercel.app/api/dogs"
+def hash_items(items: list) -> str:
+    """Stable across runs, unlike hash(), and independent of key order."""
+    return hashlib.sha256(json.dumps(items, sort_keys=True).encode()).hexdigest()[:16]
 
 
 def make_user_agent() -> str:
@@ -61,284 +180,472 @@ def make_user_agent() -> str:
     )
 
 
-async def make_request(
-    page: Optional[int] = None, limit: Optional[int] = None, **extra_params
-) -> TestResult:
-    user_agent = make_user_agent()
-    headers = {"User-Agent": user_agent}
-    params = extra_params.copy()
-    if page is not None:
-        params["page"] = page
-    if limit is not None:
-        params["limit"] = limit
-
-    start_time = time.time()
-    try:
-        with open(REQUEST_LOG, "a") as f:
-            f.write(
-                f"Request: {BASE_URL}?{'&'.join([f'{k}={v}' for k,v in params.items()])}\n"
-            )
-            f.write(f"  Headers: {headers}\n")
+def parse_pages(spec: str) -> list[int]:
+    pages = []
+    for part in spec.split(","):
+        if "-" in part:
+            start, end = part.split("-", 1)
+            pages.extend(range(int(start), int(end) + 1))
+        else:
+            pages.append(int(part))
+    return pages
+
+
+class RateLimiter:
+    """Spaces request starts at least 1/rate seconds apart."""
+
+    def __init__(self, rate: Optional[float]):
+        self.interval = 1 / rate if rate else 0
+        self.next_slot = 0.0
+        self.lock = asyncio.Lock()
+
+    async def wait(self) -> None:
+        if not self.interval:
+            return
+        async with self.lock:
+            now = time.monotonic()
+            delay = self.next_slot - now
+            self.next_slot = max(now, self.next_slot) + self.interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+class LogWriter:
+    """Queues log lines and writes them in batches from a background task."""
+
+    def __init__(self, path: Optional[str]):
+        self.path = path
+        self.queue: asyncio.Queue[Optional[str]] = asyncio.Queue()
+        self.task: Optional[asyncio.Task] = None
+
+    def write(self, line: str) -> None:
+        if self.path:
+            self.queue.put_nowait(line)
+
+    async def __aenter__(self) -> "LogWriter":
+        if self.path:
+            self.task = asyncio.create_task(self._drain())
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        if self.task is not None:
+            self.queue.put_nowait(None)
+            await self.task
+
+    async def _drain(self) -> None:
+        with open(self.path, "a") as f:
+            while True:
+                lines = [await self.queue.get()]
+                while not self.queue.empty():
+                    lines.append(self.queue.get_nowait())
+                done = lines[-1] is None
+                f.write("".join(line for line in lines if line is not None))
+                f.flush()
+                if done:
+                    return
+
+
+class Profiler:
+    def __init__(
+        self,
+        url: str,
+        concurrency: int = 4,
+        rate: Optional[float] = None,
+        timeout: float = 30.0,
+        log_path: Optional[str] = REQUEST_LOG,
+        log_bodies: bool = False,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        self.url = url
+        self.concurrency = concurrency
+        self.limiter = RateLimiter(rate)
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.log = LogWriter(log_path)
+        self.log_bodies = log_bodies
+        self.client = httpx.AsyncClient(
+            timeout=timeout,
+            transport=transport,
+            limits=httpx.Limits(
+                max_connections=concurrency, max_keepalive_connections=concurrency
+            ),
+        )
 
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.get(BASE_URL, headers=headers, params=params)
-        response_time = time.time() - start_time
+    async def __aenter__(self) -> "Profiler":
+        await self.log.__aenter__()
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.client.aclose()
+        await self.log.__aexit__(*exc)
+
+    async def request(
+        self,
+        page: Optional[int] = None,
+        attempt: int = 1,
+        headers: Optional[dict] = None,
+        **params,
+    ) -> TestResult:
+        if page is not None:
+            params["page"] = page
+        user_agent = make_user_agent()
+        headers = {"User-Agent": user_agent, **(headers or {})}
+        async with self.semaphore:
+            await self.limiter.wait()
+            start_time = time.perf_counter()
+            try:
+                response = await self.client.get(
+                    self.url, headers=headers, params=params
+                )
+            except httpx.HTTPError as e:
+                response_time = time.perf_counter() - start_time
+                self.log.write(f"Request: {self.url} {params} ERROR: {e}\n")
+                return TestResult(
+                    page=page,
+                    attempt=attempt,
+                    user_agent=user_agent,
+                    status_code=None,
+                    response_time=round(response_time, 4),
+                    json_valid=False,
+                    data_length="N/A",
+                    data_hash=None,
+                    response_size=0,
+                    query_params=params,
+                    error=str(e) or type(e).__name__,
+                )
+            response_time = time.perf_counter() - start_time
 
         try:
             data = response.json()
             json_valid = True
-            data_length = len(data) if isinstance(data, list) else "N/A"
-            data_hash = (
-                hash(json.dumps(data, sort_keys=True))
-                if isinstance(data, (list, dict))
-                else None
-            )
-            data_serial = json.dumps(data) if isinstance(data, list) else str(data)
+            items = page_items(data)
+            data_length = len(items) if items is not None else "N/A"
+            data_hash = hash_items(items) if items is not None else None
         except json.JSONDecodeError:
             data = response.text
             json_valid = False
             data_length = len(data)
             data_hash = None
-            data_serial = str(data)
 
-        result = TestResult(
+        self.log.write(
+            f"Request: {self.url} {params} UA={user_agent} -> "
+            f"{response.status_code} {response_time:.3f}s {len(response.content)}B\n"
+        )
+        if self.log_bodies:
+            self.log.write(f"Response:\n{json.dumps(data, indent=2)}\n")
+
+        return TestResult(
             page=page,
-            attempt=1,
+            attempt=attempt,
             user_agent=user_agent,
             status_code=response.status_code,
-            response_time=round(response_time, 3),
+            response_time=round(response_time, 4),
             json_valid=json_valid,
             data_length=data_length,
             data_hash=data_hash,
             response_size=len(response.content),
-            data=data_serial,
             query_params=params,
+            retry_after=(
+                float(response.headers["retry-after"])
+                if response.headers.get("retry-after", "").isdigit()
+                else None
+            ),
         )
 
-        with open(REQUEST_LOG, "a") as f:
-            f.write(f"Response:\n{json.dumps(data, indent=2)}\n")
-
-        return result
-    except Exception as e:
-        response_time = time.time() - start_time
-        result = TestResult(
-            page=page,
-            attempt=1,
-            user_agent=user_agent,
-            status_code=None,
-            response_time=round(response_time, 3),
-            json_valid=False,
-            data_length="N/A",
-            data_hash=None,
-            response_size=0,
-            data="",
-            query_params=params,
-            error=str(e),
-        )
-
-        with open(REQUEST_LOG, "a") as f:
-            f.write(f"ERROR: {str(e)}\n")
-
-        return result
-
-
-def print_result(result: TestResult):
-    query_str = "&".join([f"{k}={v}" for k, v in result.query_params.items()])
-    if query_str:
-        query_str = f"?{query_str}"
-
-    if result.error:
-        print(f"  {query_str}: ERROR - {result.error} ({result.response_time}s)")
-    else:
-        data_info = (
-            f"Data: {result.data_length}" if result.json_valid else "Invalid JSON"
+    async def page_campaign(self, pages: list[int], repeat: int) -> dict:
+        started = time.perf_counter()
+        results = await asyncio.gather(
+            *[
+                self.request(page=page, attempt=attempt + 1)
+                for attempt in range(repeat)
+                for page in pages
+            ]
         )
-        print(
-            f"  {query_str}: {result.status_code} - {data_info} ({result.response_time}s, {result.response_size} bytes)"
-        )
-
-
-async def test_limit_param(param_name: str = "limit") -> bool:
-    print("\nTesting limit parameter...")
-
-    test_limits = [1, 10, 20]
+        elapsed = time.perf_counter() - started
+
+        overall = Stats()
+        per_page: dict[int, Stats] = defaultdict(Stats)
+        for result in results:
+            overall.add(result)
+            per_page[result.page].add(result)
+
+        return {
+            "campaign": "pages",
+            "url": self.url,
+            "concurrency": self.concurrency,
+            "elapsed": round(elapsed, 3),
+            "throughput": round(len(results) / elapsed, 2) if elapsed else None,
+            "overall": overall.summary(),
+            "pages": {page: per_page[page].summary() for page in sorted(per_page)},
+            "errors": Counter(r.error for r in results if r.error),
+        }
+
+    async def overload_campaign(
+        self, pages: list[int], stages: list[int], duration: float
+    ) -> dict:
+        """
+        Closed-loop load in stages: each stage runs that many clients, each
+        sending its next request as soon as the last one returns, for
+        `duration` seconds, waiting out Retry-After when told to. Shows
+        whether the 200s' p99 stays bounded once the server starts shedding
+        with 429/503. Each client sends its own X-Forwarded-For address,
+        which uvicorn trusts from 127.0.0.1 by default, so per-client rate
+        limits apply per client.
+        """
+        results = {}
+        for clients in stages:
+            stats = Stats()
+            deadline = time.perf_counter() + duration
+
+            async def client(offset: int) -> None:
+                sent = offset
+                headers = {"X-Forwarded-For": f"10.0.{offset // 256}.{offset % 256}"}
+                while time.perf_counter() < deadline:
+                    page = pages[sent % len(pages)]
+                    result = await self.request(page=page, headers=headers)
+                    stats.add(result)
+                    sent += 1
+                    if result.retry_after:
+                        await asyncio.sleep(
+                            min(result.retry_after, deadline - time.perf_counter())
+                        )
+
+            started = time.perf_counter()
+            await asyncio.gather(*[client(i) for i in range(clients)])
+            elapsed = time.perf_counter() - started
+            summary = stats.summary()
+            results[clients] = {
+                "elapsed": round(elapsed, 3),
+                "throughput": round(summary["requests"] / elapsed, 2),
+                **summary,
+            }
+
+        return {"campaign": "overload", "url": self.url, "stages": results}
+
+    async def request_until_data(
+        self, page: int, attempts: int, **params
+    ) -> list[TestResult]:
+        """
+        Retry until a response has data, up to `attempts` times. Olive fails
+        often, so one bad response says nothing about the page.
+        """
+        results = []
+        for attempt in range(1, attempts + 1):
+            result = await self.request(page=page, attempt=attempt, **params)
+            results.append(result)
+            if result.has_data:
+                break
+        return results
 
-    for limit in test_limits:
+    async def find_last_page(self, attempts: int = 5) -> dict:
+        """Walk pages in order until one has no data after `attempts` tries."""
+        page = 1
+        last_page = None
+        results = []
         while True:
-            result = await make_request(page=1, **{param_name: limit})
-            print_result(result)
-
-            if (
-                result.status_code == 200
-                and result.json_valid
-                and isinstance(result.data_length, int)
-            ):
-                if result.data_length == limit:
-                    print(f"  Limit {limit} appears to limit resuslts")
-                    return True
-                else:
-                    print(f"  Limit {limit} did not limit results")
+            tries = await self.request_until_data(page, attempts)
+            results.extend(tries)
+            if not tries[-1].has_data:
                 break
-            else:
-                print(f"  Limit {limit} returned invalid data, retrying...")
-
-                await asyncio.sleep(0.1)
-                continue
-
-        await asyncio.sleep(0.1)
-
-    return False
-
-
-async def test_limit_param_names():
-    print("\nTesting limit parameter names...")
-
-    param_names = [
-        "limit",
-        "count",
-        "size",
-        "num",
-        "number",
-        "results",
-        "per_page",
-        "max",
-        "take",
-    ]
-
-    for param_name in param_names:
-        print(f"\nTesting parameter name: '{param_name}'")
-        result = await test_limit_param(param_name=param_name)
-        if result:
-            print(f"  Parameter name '{param_name}' appears to work for limit.")
-        else:
-            print(f"  Parameter name '{param_name}' does not limit results")
-        await asyncio.sleep(0.1)
-
-
-async def find_last_page():
-    working_pages = []
-    page = 1
-    while True:
-        result = await make_request(page=page)
-        print_result(result)
-
-        if result.status_code != 200:
-            print(f"    Page {page} returned status {result.status_code} - retrying")
-            continue
-        if result.status_code == 200 and result.json_valid and result.data_length > 0:
-            print(f"    Page {page} returned status 200 and has data, valid")
-            working_pages.append(page)
+            last_page = page
             page += 1
-        elif result.status_code == 200 and result.data_length == 0:
-            print(f"    Page {page} returns empty array - candidate last page")
-            break
-
-        await asyncio.sleep(0.1)
-
-    if not working_pages:
-        print("No working pages found")
-        return None
-
-    last_working_page = max(working_pages)
-
-    for page in range(last_working_page + 1, last_working_page + 5):
-        result = await make_request(page=page)
-        print_result(result)
 
-        if result.status_code == 200 and result.data_length == 0:
-            print(f"    Confirmed: Page {page} is empty")
-        elif result.status_code == 200 and result.data_length > 0:
-            print(f"    Unexpected: Page {page} not empty")
-            last_working_page = page
-
-        await asyncio.sleep(0.1)
-
-    print(f"Found last working page: {last_working_page}")
-    return last_working_page
-
-
-async def test_response_consistency():
-    print("\nTesting response consistency for first 10 pages...")
-
-    for page in [1, 3, 7]:
-        print(f"\n  Testing page {page}...")
-        page_results = []
-
-        for attempt in range(5):
-            result = await make_request(page=page)
-            page_results.append(result)
-            print(f"    Attempt {attempt+1}: ", end="")
-            print_result(result)
-            await asyncio.sleep(0.2)
-
-        successful_results = [
-            r
-            for r in page_results
-            if r.status_code == 200 and r.json_valid and r.data_length > 0
-        ]
-        if successful_results:
-            hashes = set(
-                r.data_hash for r in successful_results if r.data_hash is not None
+        confirm = await asyncio.gather(
+            *[self.request_until_data(p, attempts) for p in range(page + 1, page + 5)]
+        )
+        unexpected = []
+        for tries in confirm:
+            results.extend(tries)
+            if tries[-1].has_data:
+                unexpected.append(tries[-1].page)
+        return {
+            "campaign": "last-page",
+            "url": self.url,
+            "last_page": last_page,
+            "unexpected_non_empty": unexpected,
+            "results": [asdict(r) for r in results],
+        }
+
+    async def probe_limit_params(
+        self, limits: tuple[int, ...] = (1, 10, 20), attempts: int = 5
+    ) -> dict:
+        """Check which query parameter names, if any, limit the page size."""
+        names = {}
+        for name in LIMIT_PARAM_NAMES:
+            tries = await asyncio.gather(
+                *[
+                    self.request_until_data(1, attempts, **{name: limit})
+                    for limit in limits
+                ]
             )
-            if len(hashes) == 1:
-                print(f"    Page {page} is consistent")
-            else:
-                print(f"    Page {page} had {len(hashes)} unique responses")
-        else:
-            print(f"    Page {page} had no successful responses")
-
-
-async def test_page_responses(test_page: int = 1):
-    print(f"Testing page {test_page} repeatedly to look for patterns...")
-
-    results = []
-    for i in range(20):
-        result = await make_request(page=test_page)
-        results.append(result)
-        status = result.status_code or "ERR"
-        time_taken = result.response_time
-        has_data = (
-            result.data_length > 0
-            if result.json_valid and isinstance(result.data_length, int)
-            else False
+            results = [t[-1] for t in tries]
+            names[name] = {
+                "limits_results": any(
+                    r.has_data and r.data_length == limit
+                    for r, limit in zip(results, limits)
+                ),
+                "lengths": [r.data_length for r in results],
+                "statuses": [r.status_code for r in results],
+                "attempts": [len(t) for t in tries],
+            }
+        return {"campaign": "limit-params", "url": self.url, "params": names}
+
+
+def make_stub_app(latency: float, pool: int, admission: bool):
+    """
+    In-process stand-in for a DB-backed /dogs: each request holds one of
+    `pool` connections for `latency` seconds, so without admission control
+    requests queue on the pool and latency grows with load. Wrapped in the
+    backend's AdmissionMiddleware unless `admission` is False.
+    """
+    connections = asyncio.Semaphore(pool)
+
+    async def dogs(scope, receive, send):
+        async with connections:
+            await asyncio.sleep(latency)
+        body = json.dumps([{"breed": f"stub-{i}"} for i in range(15)]).encode()
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 200,
+                "headers": [(b"content-type", b"application/json")],
+            }
         )
+        await send({"type": "http.response.body", "body": body})
+
+    app = dogs
+    if admission:
+        from common.admission import AdmissionMiddleware
+
+        app = AdmissionMiddleware(dogs, paths=("/dogs",))
+
+    async def forwarded(scope, receive, send):
+        # What uvicorn's proxy headers support does for a trusted proxy.
+        for name, value in scope.get("headers", []):
+            if name == b"x-forwarded-for":
+                scope = {**scope, "client": (value.decode(), 0)}
+        await app(scope, receive, send)
+
+    return forwarded
+
+
+def print_report(report: dict) -> None:
+    if report["campaign"] == "overload":
+        print(f"{report['url']}: overload stages")
+        for clients, stats in report["stages"].items():
+            print(
+                f"  {clients:4} clients: {stats['throughput']:8} req/s "
+                f"p99={stats['latency']['p99']} "
+                f"200 p50={stats['ok_latency']['p50']} "
+                f"200 p99={stats['ok_latency']['p99']} "
+                f"statuses={stats['statuses']}"
+            )
+        return
+    if report["campaign"] != "pages":
+        print(json.dumps(report, indent=2, default=str))
+        return
+
+    overall = report["overall"]
+    latency = overall["latency"]
+    print(f"{report['url']}: {overall['requests']} requests in {report['elapsed']}s")
+    print(f"  throughput: {report['throughput']} req/s")
+    print(
+        f"  latency: p50={latency['p50']} p90={latency['p90']} "
+        f"p95={latency['p95']} p99={latency['p99']} max={latency['max']}"
+    )
+    print(f"  histogram: {latency['histogram']}")
+    print(
+        f"  200 latency: p50={overall['ok_latency']['p50']} "
+        f"p99={overall['ok_latency']['p99']}"
+    )
+    print(f"  statuses: {overall['statuses']}")
+    for page, stats in report["pages"].items():
         print(
-            f"  {i+1:2d}: {status:3} {time_taken:5.2f}s {'YES' if has_data else 'NO'}"
+            f"  page {page:3}: p50={stats['latency']['p50']} "
+            f"p99={stats['latency']['p99']} statuses={stats['statuses']} "
+            f"unique_responses={stats['unique_responses']}"
         )
-        await asyncio.sleep(0.1)
-
-    successful_results = [
-        r
-        for r in results
-        if r.status_code == 200 and r.json_valid and r.data_length > 0
-    ]
-
-    long_responses = [r for r in results if r.response_time > 5]
-    error_400 = sum(1 for r in results if r.status_code == 400)
-    error_403 = sum(1 for r in results if r.status_code == 403)
-    error_500 = sum(1 for r in results if r.status_code == 500)
-
-    print(f"  Total requests: {len(results)}")
-    print(f"  Successful (200 + contains list): {len(successful_results)}")
-    print(f"  Long responses (>5s): {len(long_responses)}")
-    print(f"  400 errors: {error_400}")
-    print(f"  403 errors: {error_403}")
-    print(f"  500 errors: {error_500}")
-
-    if len(successful_results) > 1:
-        hashes = set(r.data_hash for r in successful_results if r.data_hash is not None)
-        if len(hashes) == 1:
-            print("  All valid responses had identical data")
-        else:
-            print("  Responses had inconsistent data")
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument(
+        "campaign",
+        nargs="?",
+        choices=["pages", "last-page", "limit-params", "overload"],
+        default="pages",
+    )
+    parser.add_argument(
+        "--target",
+        default="olive",
+        help=f"one of {', '.join(TARGETS)}, stub or a full URL (default: olive)",
+    )
+    parser.add_argument(
+        "--stub-latency", type=float, default=0.05, help="stub: seconds per request"
+    )
+    parser.add_argument("--stub-pool", type=int, default=8, help="stub: DB connections")
+    parser.add_argument(
+        "--no-admission", action="store_true", help="stub: skip admission control"
+    )
+    parser.add_argument("--pages", default="1-10", help="e.g. 1-10 or 1,3,7")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("-c", "--concurrency", type=int, default=4)
+    parser.add_argument(
+        "--stages", default="8,32,128", help="overload: clients per stage"
+    )
+    parser.add_argument(
+        "--duration", type=float, default=10.0, help="overload: seconds per stage"
+    )
+    parser.add_argument(
+        "--attempts",
+        type=int,
+        default=5,
+        help="last-page, limit-params: tries per request before giving up",
+    )
+    parser.add_argument("--rate", type=float, help="max requests per second")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--log", default=REQUEST_LOG, help="request log path")
+    parser.add_argument("--no-log", action="store_true")
+    parser.add_argument("--log-bodies", action="store_true")
+    parser.add_argument("--report", help="write the JSON report to this path")
+    return parser.parse_args()
 
 
 async def main():
-    await test_limit_param_names()
-    await test_response_consistency()
-    await find_last_page()
-    await test_page_responses(test_page=1)
-    await test_page_responses(test_page=4)
+    args = parse_args()
+    stages = [int(stage) for stage in args.stages.split(",")]
+    url = TARGETS.get(args.target, args.target)
+    transport = None
+    if args.target == "stub":
+        url = "http://stub/dogs"
+        transport = httpx.ASGITransport(
+            app=make_stub_app(args.stub_latency, args.stub_pool, not args.no_admission)
+        )
+    profiler = Profiler(
+        url=url,
+        concurrency=(max(stages) if args.campaign == "overload" else args.concurrency),
+        rate=args.rate,
+        timeout=args.timeout,
+        log_path=None if args.no_log else args.log,
+        log_bodies=args.log_bodies,
+        transport=transport,
+    )
+    async with profiler:
+        if args.campaign == "pages":
+            report = await profiler.page_campaign(parse_pages(args.pages), args.repeat)
+        elif args.campaign == "overload":
+            report = await profiler.overload_campaign(
+                parse_pages(args.pages), stages, args.duration
+            )
+        elif args.campaign == "last-page":
+            report = await profiler.find_last_page(args.attempts)
+        else:
+            report = await profiler.probe_limit_params(attempts=args.attempts)
+
+    print_report(report)
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump(report, f, indent=2, default=str)
+        print(f"Report written to {args.report}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,210 @@
+import asyncio
+import json
+import math
+from collections import Counter
+from time import monotonic
+from typing import Callable, Optional
+
+from common.env import get_env
+
+ADMISSION_RATE = get_env("ADMISSION_RATE", 20.0)
+ADMISSION_BURST = get_env("ADMISSION_BURST", 40)
+ADMISSION_MAX_CLIENTS = get_env("ADMISSION_MAX_CLIENTS", 10000)
+ADMISSION_MAX_CONCURRENCY = get_env("ADMISSION_MAX_CONCURRENCY", 8)
+ADMISSION_MAX_QUEUE = get_env("ADMISSION_MAX_QUEUE", 32)
+ADMISSION_MAX_CACHED_CONCURRENCY = get_env("ADMISSION_MAX_CACHED_CONCURRENCY", 32)
+ADMISSION_MAX_CACHED_QUEUE = get_env("ADMISSION_MAX_CACHED_QUEUE", 128)
+ADMISSION_QUEUE_TIMEOUT = get_env("ADMISSION_QUEUE_TIMEOUT", 2.0)
+ADMISSION_TARGET_LATENCY = get_env("ADMISSION_TARGET_LATENCY", 0.5)
+ADMISSION_RETRY_AFTER = get_env("ADMISSION_RETRY_AFTER", 1)
+
+
+class _TokenBucket:
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = monotonic()
+
+    def take(self) -> float:
+        """Take a token. Returns 0 on success, else seconds until one is free."""
+        now = monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0
+        return (1 - self.tokens) / self.rate
+
+
+class _Gate:
+    """
+    Concurrency slots with a bounded wait queue. The queue is sized from the
+    moving average latency of admitted requests so the expected wait stays
+    under ADMISSION_TARGET_LATENCY; requests that cannot queue, or wait longer
+    than ADMISSION_QUEUE_TIMEOUT, are refused.
+    """
+
+    def __init__(self, max_concurrency: int, max_queue: int):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.in_flight = 0
+        self.waiting = 0
+        self.latency = 0.0
+        self._slots: Optional[asyncio.Semaphore] = None
+
+    @property
+    def slots(self) -> asyncio.Semaphore:
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_concurrency)
+        return self._slots
+
+    def queue_limit(self) -> int:
+        # A queued request waits about waiting * latency / max_concurrency, so
+        # cap the queue where that estimate reaches ADMISSION_TARGET_LATENCY.
+        if not self.latency:
+            return self.max_queue
+        fits = int(ADMISSION_TARGET_LATENCY * self.max_concurrency / self.latency)
+        return min(self.max_queue, fits)
+
+    async def acquire(self) -> bool:
+        if not self.slots.locked():
+            await self.slots.acquire()
+        else:
+            if self.waiting >= self.queue_limit():
+                return False
+            self.waiting += 1
+            try:
+                await asyncio.wait_for(self.slots.acquire(), ADMISSION_QUEUE_TIMEOUT)
+            except asyncio.TimeoutError:
+                return False
+            finally:
+                self.waiting -= 1
+        self.in_flight += 1
+        return True
+
+    def release(self, duration: float) -> None:
+        self.in_flight -= 1
+        self.slots.release()
+        self.latency = 0.8 * self.latency + 0.2 * duration
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "queue_limit": self.queue_limit(),
+            "latency": round(self.latency, 4),
+        }
+
+
+class _Admission:
+    """
+    Admission state shared by every AdmissionMiddleware instance.
+
+    Requests first take a token from their client's bucket (429 when empty).
+    Clients are keyed by the ASGI client address, which uvicorn takes from
+    X-Forwarded-For for peers in FORWARDED_ALLOW_IPS, so that must list only
+    the real proxy or callers can rotate the header to get fresh buckets.
+    Requests that will be served from cache then go through the cached gate,
+    and the rest through the smaller database gate, so a flood of database
+    work cannot crowd out cheap requests. Either gate answers 503 when full.
+    Together the gates stay within AnyIO's default of 40 worker threads.
+    """
+
+    def __init__(self):
+        self.buckets: dict[str, _TokenBucket] = {}
+        self.counters: Counter = Counter()
+        self.gates = {
+            "cached": _Gate(
+                ADMISSION_MAX_CACHED_CONCURRENCY, ADMISSION_MAX_CACHED_QUEUE
+            ),
+            "db": _Gate(ADMISSION_MAX_CONCURRENCY, ADMISSION_MAX_QUEUE),
+        }
+
+    def rate_limit(self, client: str) -> float:
+        bucket = self.buckets.get(client)
+        if bucket is None:
+            if len(self.buckets) >= ADMISSION_MAX_CLIENTS:
+                self._prune()
+            bucket = self.buckets[client] = _TokenBucket(
+                ADMISSION_RATE, ADMISSION_BURST
+            )
+        return bucket.take()
+
+    def stats(self) -> dict:
+        return {
+            "clients": len(self.buckets),
+            "counters": dict(self.counters),
+            **{name: gate.stats() for name, gate in self.gates.items()},
+        }
+
+    def _prune(self) -> None:
+        now = monotonic()
+        for client, bucket in list(self.buckets.items()):
+            if bucket.tokens + (now - bucket.updated) * bucket.rate >= bucket.burst:
+                del self.buckets[client]
+
+
+Admission = _Admission()
+
+
+class AdmissionMiddleware:
+    """
+    ASGI middleware applying Admission to requests whose path starts with one
+    of `paths`. `is_cached(scope)` tells it which requests will not touch the
+    database and so can use the larger cached gate.
+    """
+
+    def __init__(
+        self,
+        app,
+        paths: tuple[str, ...] = ("/",),
+        is_cached: Optional[Callable[[dict], bool]] = None,
+    ):
+        self.app = app
+        self.paths = paths
+        self.is_cached = is_cached
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not scope["path"].startswith(self.paths):
+            await self.app(scope, receive, send)
+            return
+
+        client = scope["client"][0] if scope.get("client") else "unknown"
+        retry_after = Admission.rate_limit(client)
+        if retry_after:
+            Admission.counters["rate_limited"] += 1
+            await self._reject(send, 429, retry_after)
+            return
+
+        cached = self.is_cached is not None and self.is_cached(scope)
+        gate_name = "cached" if cached else "db"
+        gate = Admission.gates[gate_name]
+        if not await gate.acquire():
+            Admission.counters[f"shed_{gate_name}"] += 1
+            await self._reject(send, 503, ADMISSION_RETRY_AFTER)
+            return
+
+        Admission.counters[f"admitted_{gate_name}"] += 1
+        started = monotonic()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            gate.release(monotonic() - started)
+
+    async def _reject(self, send, status: int, retry_after: float) -> None:
+        body = json.dumps(
+            {"detail": "Too many requests" if status == 429 else "Server busy"}
+        ).encode()
+        await send(
+            {
+                "type": "http.response.start",
+                "status": status,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode()),
+                    (b"retry-after", str(math.ceil(retry_after)).encode()),
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": body})
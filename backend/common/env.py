@@ -20,7 +20,7 @@ def get_env(key: str, default: Optional[Any] = None) -> Optional[Any]:
             return value
         elif isinstance(default, int) and value.isdigit():
             return int(value)
-        elif isinstance(default, float) and "." in value:
+        elif isinstance(default, float):
             try:
                 return float(value)
             except (TypeError, ValueError):
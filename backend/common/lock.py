@@ -0,0 +1,50 @@
+import fcntl
+import os
+import tempfile
+
+
+def lock_path(name: str) -> str:
+    return os.path.join(tempfile.gettempdir(), f"{name}.lock")
+
+
+class FileLock:
+    """
+    flock(2) on a file in the temp dir, shared by every process on the host.
+    The kernel drops it when the holder exits, so a crashed worker never
+    leaves it held.
+    """
+
+    def __init__(self, name: str):
+        self.path = lock_path(name)
+        self.file = None
+
+    @property
+    def held(self) -> bool:
+        return self.file is not None
+
+    def acquire(self, blocking: bool = True, shared: bool = False) -> bool:
+        if self.file is None:
+            self.file = open(self.path, "a")
+        flags = fcntl.LOCK_SH if shared else fcntl.LOCK_EX
+        if not blocking:
+            flags |= fcntl.LOCK_NB
+        try:
+            fcntl.flock(self.file, flags)
+        except BlockingIOError:
+            self.file.close()
+            self.file = None
+            return False
+        return True
+
+    def release(self) -> None:
+        if self.file is not None:
+            fcntl.flock(self.file, fcntl.LOCK_UN)
+            self.file.close()
+            self.file = None
+
+    def __enter__(self) -> "FileLock":
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.release()
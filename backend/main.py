@@ -1,29 +1,29 @@
-import asyncio
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
-from api.dogs.retriever import DogRetriever
+from api.dogs.catalogue import Catalogue
+from api.dogs.router import is_cached_request
+from api.dogs.scheduler import DogSync
 from api.router import include_routers
-from common.env import get_env
+from common.admission import AdmissionMiddleware
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    initial_sync = asyncio.create_task(DogRetriever.sync_dogs())
-    periodic_sync = asyncio.create_task(doggo_sync())
+    Catalogue.open()
+    DogSync.start()
     yield
-    initial_sync.cancel()
-    periodic_sync.cancel()
-
-
-async def doggo_sync():
-    while True:
-        await asyncio.sleep(get_env("DOG_SYNC_INTERVAL", 300))
-        await DogRetriever.sync_dogs()
+    await DogSync.stop()
+    Catalogue.close()
 
 
 app = FastAPI(lifespan=lifespan)
+app.add_middleware(
+    AdmissionMiddleware,
+    paths=("/dogs",),
+    is_cached=is_cached_request,
+)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],